@@ -1,16 +1,52 @@
-def ints_to_signed_shorts(*ints: int) -> bytes:
-    return b''.join([
-        int_.to_bytes(2, 'big', signed=True)
-        for int_ in ints
-    ])
+import struct
+from functools import lru_cache
+from typing import Union
 
+ColorType = Union[str, int, bytes]
 
-def hex_colors_to_bytes(*hex_colors: str) -> bytes:
-    out = b''
-    for hex_color in hex_colors:
-        if len(hex_color) != 6:
+
+def pack_struct(packer: struct.Struct, *values) -> bytes:
+    """Packs values with a precompiled struct, raising ValueError if they don't fit the format"""
+    try:
+        return packer.pack(*values)
+    except struct.error as error:
+        raise ValueError(f'Values {values} cannot be packed into the format {packer.format}: {error}') from error
+
+
+def _color_to_bytes(color: ColorType) -> bytes:
+    if isinstance(color, str):
+        if len(color) != 6:
             raise ValueError('Hex colors must be 6 characters long')
 
-        out += bytes.fromhex(hex_color)
+        color_bytes = bytes.fromhex(color)
+        if len(color_bytes) != 3:
+            raise ValueError('Hex colors must be 6 hex digits without any spaces')
+
+        return color_bytes
+
+    if isinstance(color, int):
+        if color < 0 or color > 0xFFFFFF:
+            raise ValueError('Integer colors must be between 0x000000 and 0xFFFFFF')
+
+        return color.to_bytes(3, 'big')
+
+    if isinstance(color, bytes):
+        if len(color) != 3:
+            raise ValueError('Byte colors must be 3 bytes long')
+
+        return color
+
+    raise TypeError('Colors must be hex strings, integers, or bytes')
+
+
+@lru_cache(maxsize=256, typed=True)  # equal ints and floats or bools must not share results
+def hex_colors_to_bytes(*colors: ColorType) -> bytes:
+    """Converts colors given as 6 character hex strings like 'FF8000', integers like 0xFF8000,
+    or 3 bytes like b'\\xff\\x80\\x00' to the 3 bytes per color the display expects
+    """
+    if all(isinstance(color, str) and len(color) == 6 for color in colors):
+        colors_bytes = bytes.fromhex(''.join(colors))
+        if len(colors_bytes) == 3 * len(colors):
+            return colors_bytes
 
-    return out
+    return b''.join(_color_to_bytes(color) for color in colors)
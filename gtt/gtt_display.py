@@ -1,4 +1,7 @@
-from typing import Dict, Set, Union
+import struct
+from collections import deque
+from contextlib import contextmanager
+from typing import Callable, Deque, Dict, Iterable, List, Optional, Set, Tuple, Union
 
 import serial
 
@@ -8,45 +11,225 @@ from gtt.exceptions import UnexpectedResponse, StatusError, OutOfIdsError
 
 ID_MAX = 0xff
 
+_MAX_UNCHECKED_STATUSES = 128
+"""How many status responses wait=False may leave unread, small enough that they always fit in the input buffer"""
+
+_CMD_GET_MODULE_INFO = b'\xfe\x03'
+_CMD_CLEAR_SCREEN = b'\xfe\x58'
+_CMD_CREATE_BAR = b'\xfe\x67'
+_CMD_UPDATE_BAR = b'\xfe\x69'
+
+_UNSIGNED_SHORT_STRUCT = struct.Struct('>H')
+_DIMENSIONS_STRUCT = struct.Struct('>HH')
+_CREATE_BAR_STRUCT = struct.Struct('>2sB6h6sB')
+_UPDATE_BAR_STRUCT = struct.Struct('>2sBh')
+
 IdType = Union[int, str]
 
 
 class GttDisplay:
-    def __init__(self, port: str):
-        """:param port: a serial port like COM3 or /dev/ttyUSB0"""
-        self._conn = serial.Serial(port, baudrate=115200, rtscts=True, timeout=0.5)
+    __slots__ = (
+        '_conn', '_tx_buffer', '_tx_bar_updates', '_tx_status_count', '_tx_id_lookup', '_tx_free_id_mask',
+        '_pending_statuses', '_id_lookup', '_free_id_mask', '_pipeline_depth', 'width', 'height',
+    )
 
-        self._conn.write(b'\xfe\x03')
-        info_bytes = self._receive_query_response(252, 3)
+    def __init__(self, port: str, pipeline_depth: int = 0, baudrate: int = 115200, timeout: float = 0.5,
+                 rtscts: bool = True):
+        """
+        :param port: a serial port like COM3 or /dev/ttyUSB0
+        :param pipeline_depth: the initial value of :attr:`pipeline_depth`
+        :param baudrate: the baud rate the display is configured to use. GTT displays default to 115200,
+            but they can be configured to run much faster which speeds up every command.
+        :param timeout: how many seconds to wait for a response from the display before raising a TimeoutError
+        :param rtscts: Use RTS/CTS hardware flow control. Some USB serial adapters add latency when it is enabled,
+            and most commands already wait for a status response which paces the host, so it can be turned off
+            as long as batches and pipelines are kept small enough for the display's receive buffer.
+        """
+        self.pipeline_depth = pipeline_depth
 
-        self.width: int = int.from_bytes(info_bytes[:2], 'big')
-        """The height of this display in pixels"""
+        self._conn = serial.Serial(port, baudrate=baudrate, rtscts=rtscts, timeout=timeout)
+        self._enable_low_latency_mode()
+        self._tx_buffer: Optional[bytearray] = None
+        self._tx_bar_updates: Dict[int, int] = {}
+        """Maps bar IDs to the offset of an update command for that bar which is waiting in the batch buffer"""
+        self._tx_status_count = 0
+        """How many of the pending statuses belong to commands which are still waiting in the batch buffer"""
+        self._tx_id_lookup: Dict[IdType, int] = {}
+        self._tx_free_id_mask = 0
+        """The ID state from before the commands waiting in the batch buffer, restored if they are discarded"""
+        self._pending_statuses: Deque[Tuple[int, ...]] = deque()
+
+        self._write(_CMD_GET_MODULE_INFO)
+        info_bytes = self._receive_query_response(252, 3, min_payload_len=4)
 
-        self.height: int = int.from_bytes(info_bytes[2: 4], 'big')
+        width, height = _DIMENSIONS_STRUCT.unpack_from(info_bytes)
+
+        self.width: int = width
+        """The width of this display in pixels"""
+
+        self.height: int = height
         """The height of this display in pixels"""
 
-        self._id_map: Dict[str, int] = {}
-        self.ids_in_use: Set[int] = set()
+        self._id_lookup: Dict[IdType, int] = {}
+        self._free_id_mask = ((1 << (ID_MAX + 1)) - 1) & ~1
+        """Bit n is set if integer ID n can still be assigned to a string ID. ID 0 is never auto-assigned."""
+
+    @property
+    def pipeline_depth(self) -> int:
+        """How many commands may be waiting on a status response before the oldest response is checked.
+        At 0, every command waits for its own response.
+        Higher values let commands be sent back to back without waiting a round trip for each of them,
+        but a failed command will only raise a StatusError during a later call or a call to :meth:`sync`.
+        """
+        return self._pipeline_depth
+
+    @pipeline_depth.setter
+    def pipeline_depth(self, pipeline_depth: int):
+        if pipeline_depth < 0:
+            raise ValueError('The pipeline depth cannot be negative')
+
+        self._pipeline_depth = pipeline_depth
+
+    @property
+    def ids_in_use(self) -> Set[int]:
         """This stores all the integer IDs of the components created by this GttDisplay instance.
-        If you use a mix of string and integer IDs to refer to your components, 
+        If you use a mix of string and integer IDs to refer to your components,
         you may want to check whether new integer IDs exist in this set before using them.
         """
+        return set(self._id_lookup.values())
+
+    def _enable_low_latency_mode(self):
+        """USB serial adapters like FTDI chips hold small reads back for up to 16ms by default,
+        which would delay every status response by that much.
+        This asks the driver to pass bytes through immediately where the platform supports it.
+        """
+        if not hasattr(self._conn, 'set_low_latency_mode'):
+            return  # pyserial's Windows backend doesn't have this
+
+        try:
+            self._conn.set_low_latency_mode(True)
+        except (OSError, ValueError, NotImplementedError):
+            pass  # only Linux supports ASYNC_LOW_LATENCY and not every driver does; the display works without it
+
+    def _write(self, data: bytes):
+        """Sends data to the display, or holds onto it until the next flush if a batch is active"""
+        if self._tx_buffer is None:
+            self._conn.write(data)
+        else:
+            self._tx_bar_updates.clear()  # bar updates before this command can't be overwritten without reordering
+            self._tx_buffer += data
+
+    def _write_bar_updates(self, updates: List[Tuple[int, int]], wait: bool = True, prefix: bytes = b''):
+        """Sends update commands for pairs of resolved bar IDs and values and expects their status responses.
+        Inside of a batch, an update for a bar which already has an update waiting in the buffer
+        overwrites the value of that update instead of being sent, since only the last value would be visible anyway.
+
+        :param prefix: another command to send in the same write, before the updates
+        """
+        frames = [pack_struct(_UPDATE_BAR_STRUCT, _CMD_UPDATE_BAR, bar_id, value) for bar_id, value in updates]
+
+        if self._tx_buffer is None:
+            self._conn.write(prefix + b''.join(frames))
+            self._expect_status_response(252, 105, wait=wait, count=len(frames))
+            return
+
+        if prefix:
+            self._write(prefix)
+
+        for (bar_id, _), frame in zip(updates, frames):
+            offset = self._tx_bar_updates.get(bar_id)
+            if offset is None:
+                self._tx_bar_updates[bar_id] = len(self._tx_buffer)
+                self._tx_buffer += frame
+                self._expect_status_response(252, 105, wait=wait)
+            else:
+                self._tx_buffer[offset: offset + len(frame)] = frame
+
+    def flush(self):
+        """Sends any commands which are being held back by :meth:`batch`.
+        Commands are also flushed automatically whenever a response from the display is needed.
+        """
+        if self._tx_buffer:
+            self._conn.write(bytes(self._tx_buffer))
+            self._tx_buffer.clear()
+            self._tx_bar_updates.clear()
+            self._tx_status_count = 0
+
+        if self._tx_buffer is not None:
+            self._save_id_state()
+
+    def _save_id_state(self):
+        """Remembers which IDs are in use by commands that have been sent, for :meth:`_discard_tx_buffer`"""
+        self._tx_id_lookup = self._id_lookup.copy()
+        self._tx_free_id_mask = self._free_id_mask
+
+    def _discard_tx_buffer(self):
+        """Drops the commands held back by a batch along with the status responses they would have caused
+        and the IDs of the components they would have created
+        """
+        for _ in range(self._tx_status_count):
+            self._pending_statuses.pop()
+
+        self._tx_buffer.clear()
+        self._tx_bar_updates.clear()
+        self._tx_status_count = 0
+
+        self._id_lookup = self._tx_id_lookup
+        self._free_id_mask = self._tx_free_id_mask
+        self._save_id_state()
+
+    @contextmanager
+    def batch(self):
+        """A context manager which holds back the commands sent inside of it and sends them all in one write.
+        Status responses are not waited on inside the block either.
+        When the block exits, the commands are sent and all of their responses are checked like in :meth:`sync`,
+        so a StatusError from any command in the block is raised there.
+        If the block raises an exception instead, the commands which haven't been sent yet are dropped
+        and the IDs of any components they would have created can be used again.
+        """
+        if self._tx_buffer is not None:
+            yield self
+            return
+
+        self._tx_buffer = bytearray()
+        self._save_id_state()
+        try:
+            yield self
+        except BaseException:
+            self._discard_tx_buffer()
+            raise
+        finally:
+            self.flush()
+            self._tx_buffer = None
+
+        self.sync()
+
+    def sync(self):
+        """Sends any held back commands and waits for the responses of all pipelined commands.
+        Raises a StatusError if any of those commands failed.
+        """
+        self.flush()
 
-    def _validate_x(self, *x_values: int):
-        for x_value in x_values:
-            if x_value < 0:
-                raise ValueError('These arguments would result in a negative x value')
+        pending, receive = self._pending_statuses, self._receive_status_response
+        while pending:
+            receive(*pending.popleft())
 
-            if x_value >= self.width:
-                raise ValueError('These arguments would result in an x value which is too wide to be displayed')
+    def _validate_rect(self, x_pos: int, y_pos: int, width: int, height: int):
+        """Raises a ValueError if a rectangle with the given top left corner and size would not fit on the screen"""
+        if width < 1 or height < 1:
+            raise ValueError('Width and height must be at least one pixel')
 
-    def _validate_y(self, *y_values: int):
-        for y_value in y_values:
-            if y_value < 0:
-                raise ValueError('These arguments would result in a negative y value')
+        if x_pos < 0:
+            raise ValueError('These arguments would result in a negative x value')
 
-            if y_value >= self.height:
-                raise ValueError('These arguments would result in an y value which is past the bottom of the screen')
+        if x_pos + width > self.width:
+            raise ValueError('These arguments would result in an x value which is too wide to be displayed')
+
+        if y_pos < 0:
+            raise ValueError('These arguments would result in a negative y value')
+
+        if y_pos + height > self.height:
+            raise ValueError('These arguments would result in an y value which is past the bottom of the screen')
 
     def _resolve_id(self, unresolved_id: IdType, new=False) -> int:
         """Takes a string specified by the user, validates it, and converts it to an integer if necessary
@@ -58,34 +241,34 @@ class GttDisplay:
         if not isinstance(unresolved_id, (int, str)):
             raise TypeError('IDs must be integers or strings')
 
-        if new:
-            if unresolved_id in self._id_map or unresolved_id in self.ids_in_use:
-                raise ValueError(f'The ID you specified ({unresolved_id}) for a new component is already in use')
+        if not new:
+            try:
+                return self._id_lookup[unresolved_id]
+            except KeyError:
+                raise ValueError(
+                    f'The ID you specified ({unresolved_id}) does not refer to any existing component'
+                ) from None
 
-            elif isinstance(unresolved_id, str):
-                for integer in range(ID_MAX, 0, -1):
-                    if integer not in self.ids_in_use:
+        if unresolved_id in self._id_lookup:
+            raise ValueError(f'The ID you specified ({unresolved_id}) for a new component is already in use')
 
-                        self.ids_in_use.add(integer)
-                        self._id_map[unresolved_id] = integer
-                        return integer
+        elif isinstance(unresolved_id, str):
+            if not self._free_id_mask:
                 raise OutOfIdsError('Cannot assign a new integer ID because all possible IDs are in use')
 
-            else:
-                if unresolved_id < 0 or unresolved_id > ID_MAX:
-                    raise ValueError(f'IDs must be greater than zero and less than {ID_MAX}')
+            integer = self._free_id_mask.bit_length() - 1
+            self._free_id_mask &= ~(1 << integer)
+            self._id_lookup[integer] = integer
+            self._id_lookup[unresolved_id] = integer
+            return integer
 
-                self.ids_in_use.add(unresolved_id)
-                return unresolved_id
         else:
-            if unresolved_id not in self._id_map and unresolved_id not in self.ids_in_use:
-                raise ValueError(f'The ID you specified ({unresolved_id}) does not refer to any existing component')
+            if unresolved_id < 0 or unresolved_id > ID_MAX:
+                raise ValueError(f'IDs must be greater than zero and less than {ID_MAX}')
 
-            elif isinstance(unresolved_id, str):
-                return self._id_map[unresolved_id]
-
-            else:
-                return unresolved_id
+            self._free_id_mask &= ~(1 << unresolved_id)
+            self._id_lookup[unresolved_id] = unresolved_id
+            return unresolved_id
 
     def _receive_status_response(self, *header_ints: int):
         """For some commands, the GTT will respond with a few header bytes followed by a length short
@@ -94,53 +277,76 @@ class GttDisplay:
 
         :param header_ints: An exception will be raised if the response does not start with these bytes.
         """
-        status_bytes = self._receive_query_response(*header_ints)
-        status_codes = [byte for byte in status_bytes]
+        status_bytes = self._receive_query_response(*header_ints, min_payload_len=1)
 
-        if any(code != 0xfe for code in status_codes):
-            raise StatusError(*status_codes)
+        if status_bytes.strip(b'\xfe'):
+            raise StatusError(*status_bytes)
 
-    def _receive_query_response(self, *header_ints) -> bytes:
-        """Receives the response of a query command which are a few header bytes, a length short, and then a payload.
+    def _read_exactly(self, size: int) -> bytes:
+        """Reads size bytes from the display and raises a TimeoutError if fewer than that arrive in time"""
+        recv = self._conn.read(size)
 
-        :param header_ints: An exception will be raised if the response does not start with these bytes.
-        :return: the payload as bytes for the message.
+        if len(recv) != size:
+            raise TimeoutError(f'Timed out after receiving {len(recv)} of {size} expected bytes')
+
+        return recv
+
+    def _expect_status_response(self, *header_ints: int, wait: bool = True, count: int = 1):
+        """Like _receive_status_response, but the response may be checked later depending on pipeline_depth.
+        Inside of a batch, responses are always checked later.
+        If wait is False, they are only checked once more than _MAX_UNCHECKED_STATUSES are unread, so that
+        the input buffer never fills up and stops the display from sending with flow control.
+        Responses arrive in the order the commands were sent, so they are always checked oldest first.
+
+        :param count: how many commands with this response were sent.
+            All of them are recorded before any are checked so that a failure leaves none of them unread.
         """
-        expected_str = ''
-        received_str = ''
+        self._pending_statuses.extend([header_ints] * count)
+        if self._tx_buffer is not None:
+            self._tx_status_count += count
+            return
+
+        max_pending = self._pipeline_depth if wait else max(self._pipeline_depth, _MAX_UNCHECKED_STATUSES)
 
-        for expected_int in header_ints:
-            response = self._conn.read(1)
-            received_int = int.from_bytes(response, byteorder='big')
+        pending, receive = self._pending_statuses, self._receive_status_response
+        while len(pending) > max_pending:
+            receive(*pending.popleft())
 
-            expected_str += f'{expected_int:d} '
-            received_str += f'{received_int:d} '
+    def _receive_query_response(self, *header_ints, min_payload_len: int = 0) -> bytes:
+        """Receives the response of a query command which are a few header bytes, a length short, and then a payload.
 
-            if response == b'':
-                raise TimeoutError('Timed out when receiving a response')
+        :param header_ints: An exception will be raised if the response does not start with these bytes.
+        :param min_payload_len: How many payload bytes the response is known to have at least.
+            These are read together with the header so that short responses only take a single read.
+        :return: the payload as bytes for the message.
+        """
+        self.flush()
 
-            if received_int != expected_int:
-                raise UnexpectedResponse(f'Expected response starting with {expected_str} but got {received_str}')
+        expected = bytes(header_ints)
+        fixed_len = len(expected) + 2
+        received = self._read_exactly(fixed_len + min_payload_len)
 
-        payload_len = self._conn.read(2)
-        if payload_len == b'':
-            raise UnexpectedResponse('Expected a length byte but got nothing')
+        if received[:len(expected)] != expected:
+            expected_str = ' '.join(f'{int_:d}' for int_ in expected)
+            received_str = ' '.join(f'{int_:d}' for int_ in received[:len(expected)])
+            raise UnexpectedResponse(f'Expected response starting with {expected_str} but got {received_str}')
 
-        payload_len = int.from_bytes(payload_len, 'big')
-        recv = self._conn.read(payload_len)
+        payload_len, = _UNSIGNED_SHORT_STRUCT.unpack_from(received, len(expected))
+        if payload_len < min_payload_len:
+            raise UnexpectedResponse(f'Expected at least {min_payload_len} bytes in response but got {payload_len}')
 
-        if len(recv) != payload_len:
-            raise UnexpectedResponse(f'Expected {payload_len} bytes in response but only got {len(recv)}')
+        if payload_len == min_payload_len:
+            return received[fixed_len:]
 
-        return recv
+        return received[fixed_len:] + self._read_exactly(payload_len - min_payload_len)
 
     def clear_screen(self):
         """Clears everything on the screen and resets insertion cursors"""
-        self._conn.write(bytes.fromhex('FE 58'))
+        self._write(_CMD_CLEAR_SCREEN)
 
     def create_plain_bar(self, bar_id: IdType, value: int, max_value: int,
                          x_pos: int, y_pos: int, width: int, height: int,
-                         min_value: int = 0, fg_color_hex='FFFFFF', bg_color_hex='000000',
+                         min_value: int = 0, fg_color_hex: ColorType = 'FFFFFF', bg_color_hex: ColorType = '000000',
                          direction: BarDirection = BarDirection.BOTTOM_TO_TOP):
         """Creates a bar graph which is really just a single bar.
 
@@ -153,32 +359,56 @@ class GttDisplay:
         :param width: the width of the bar in pixels
         :param height: the height of the bar in pixels
         :param min_value: the minimum value which can be shown are the bar
-        :param fg_color_hex: a hex color string for the filled part of the bar
-        :param bg_color_hex: a hex color string for the unfilled part of the bar
+        :param fg_color_hex: a hex color string like 'FF8000' for the filled part of the bar.
+            An integer like 0xFF8000 or 3 bytes are also accepted and skip parsing the hex string.
+        :param bg_color_hex: a color for the unfilled part of the bar in any of the forms fg_color_hex accepts
         :param direction: Describes how the bar will grow and shrink based on the current value
         """
-        self._validate_x(x_pos, x_pos + width - 1)
-        self._validate_y(y_pos, y_pos + height - 1)
+        self._validate_rect(x_pos, y_pos, width, height)
         bar_id = self._resolve_id(bar_id, new=True)
 
-        self._conn.write(
-            bytes.fromhex('FE 67') +
-            bar_id.to_bytes(1, 'big') +
-            ints_to_signed_shorts(min_value, max_value, x_pos, y_pos, width, height) +
-            hex_colors_to_bytes(fg_color_hex, bg_color_hex) +
-            direction.to_bytes(1, 'big')
+        create_command = pack_struct(
+            _CREATE_BAR_STRUCT, _CMD_CREATE_BAR, bar_id,
+            min_value, max_value, x_pos, y_pos, width, height,
+            hex_colors_to_bytes(fg_color_hex, bg_color_hex), direction
         )
+        self._write_bar_updates([(bar_id, value)], prefix=create_command)
 
-        self.update_bar_value(bar_id, value)
+    def update_bar_value(self, bar_id: IdType, value: int, wait: bool = True):
+        """Sets the value of the bar given by bar_id to value which should be between it's min and max values
 
-    def update_bar_value(self, bar_id: IdType, value: int):
-        """Sets the value of the bar given by bar_id to value which should be between it's min and max values"""
-        bar_id = self._resolve_id(bar_id)
+        :param wait: If False, don't wait for the display to confirm the update.
+            The confirmation will be checked during a later call or a call to :meth:`sync`.
+            Only the oldest confirmations are checked once too many are unread,
+            so call :meth:`sync` after a run of these to find out about failures promptly.
+        """
+        self._write_bar_updates([(self._resolve_id(bar_id), value)], wait=wait)
 
-        self._conn.write(
-            bytes.fromhex('FE 69') +
-            bar_id.to_bytes(1, 'big') +
-            ints_to_signed_shorts(value)
-        )
+    def make_bar_updater(self, bar_id: IdType, wait: bool = True) -> Callable[[int], None]:
+        """Returns a function which takes a value and sets the bar given by bar_id to it like update_bar_value does.
+        The bar's ID is only looked up once, which helps in loops which update the same bar many times per second.
 
-        self._receive_status_response(252, 105)
+        :param wait: If False, the returned function won't wait for the display to confirm each update.
+            Like with update_bar_value, call :meth:`sync` now and then to check the confirmations.
+        """
+        resolved_id = self._resolve_id(bar_id)
+        write_bar_updates = self._write_bar_updates
+
+        def update(value: int):
+            write_bar_updates([(resolved_id, value)], wait=wait)
+
+        return update
+
+    def update_many_bar_values(self, bar_values: Iterable[Tuple[IdType, int]], wait: bool = True):
+        """Sets the values of several bars at once, which is much faster than calling update_bar_value for each of them
+        because all of the updates are sent in a single write.
+
+        :param bar_values: pairs of bar IDs and the values to set them to, like ``{'speed': 5, 'rpm': 30}.items()``
+        :param wait: If False, don't wait for the display to confirm the updates.
+            The confirmations will be checked during a later call or a call to :meth:`sync`.
+            Only the oldest confirmations are checked once too many are unread,
+            so call :meth:`sync` after a run of these to find out about failures promptly.
+        """
+        updates = [(self._resolve_id(bar_id), value) for bar_id, value in bar_values]
+        if updates:
+            self._write_bar_updates(updates, wait=wait)
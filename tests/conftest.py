@@ -1,5 +1,131 @@
+from collections import deque
+
+import pytest
+import serial
+
+from gtt import GttDisplay
+
+
+class MonitoredSerialConn(serial.Serial):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+
+        self.sent_messages = list()
+        self.bytes_received = bytearray()
+
+    def write(self, data):
+        super().write(data)
+        self.sent_messages.append(data)
+
+    def read(self, size=1):
+        recv = super().read(size)
+        self.bytes_received.extend(recv)
+        return recv
+
+
+class MockedSerialConn:
+    """Stands in for a serial connection to a 480x272 GTT display so the tests can run without one.
+    It records traffic like MonitoredSerialConn and answers commands the way the display would.
+    Status codes appended to failed_bar_updates are used to answer the next bar updates instead of success.
+    """
+    COMMAND_LENGTHS = {0x03: 2, 0x58: 2, 0x67: 22, 0x69: 5}
+    RESPONSES = {
+        0x03: bytes.fromhex('FC 03 0004 01E0 0110'),
+    }
+
+    def __init__(self, *args, **kwargs):
+        self.sent_messages = list()
+        self.bytes_received = bytearray()
+        self.failed_bar_updates = deque()
+
+        self._unparsed = bytearray()
+        self._responses = bytearray()
+
+    def write(self, data):
+        self.sent_messages.append(data)
+        self._unparsed.extend(data)
+
+        while len(self._unparsed) >= 2:
+            if self._unparsed[0] != 0xfe or self._unparsed[1] not in self.COMMAND_LENGTHS:
+                raise ValueError(f'The mock display does not understand {bytes(self._unparsed)}')
+
+            command_len = self.COMMAND_LENGTHS[self._unparsed[1]]
+            if len(self._unparsed) < command_len:
+                break
+
+            if self._unparsed[1] == 0x69:
+                status = self.failed_bar_updates.popleft() if self.failed_bar_updates else 0xfe
+                self._responses.extend(bytes.fromhex('FC 69 0001') + bytes([status]))
+            else:
+                self._responses.extend(self.RESPONSES.get(self._unparsed[1], b''))
+            del self._unparsed[:command_len]
+
+        return len(data)
+
+    def read(self, size=1):
+        recv = bytes(self._responses[:size])
+        del self._responses[:size]
+        self.bytes_received.extend(recv)
+        return recv
+
+
+@pytest.fixture
+def mocked_serial(monkeypatch):
+    """Makes GttDisplay connect to a MockedSerialConn and returns that class so tests can change how it behaves"""
+    monkeypatch.setattr(serial, 'Serial', MockedSerialConn)
+    return MockedSerialConn
+
+
+@pytest.fixture
+def mocked_display(mocked_serial):
+    """A display connected to a MockedSerialConn even with --real-display, for tests which need to make it fail"""
+    return GttDisplay('/dev/ttyUSB0')
+
+
+@pytest.fixture
+def display(pytestconfig, monkeypatch):
+    if pytestconfig.getoption('--real-display'):
+        monkeypatch.setattr(serial, 'Serial', MonitoredSerialConn)
+        display = GttDisplay('/dev/ttyUSB0')
+        display.clear_screen()
+    else:
+        monkeypatch.setattr(serial, 'Serial', MockedSerialConn)
+        display = GttDisplay('/dev/ttyUSB0')  # a fresh mock has nothing on screen to clear
+
+    return display
+
+
+class ManualVerifyFailure(Exception):
+    """Raised when the person running the test does not think that the driver code is working right"""
+    pass
+
+
+@pytest.fixture
+def cli_verify(pytestconfig):
+    def check_expectation(expectation: str):
+        while True:
+            response = input(f'Verify that {expectation} (Y/n): ')
+            response = response.lower().strip()
+
+            if response in ['y', '']:
+                return
+            elif response == 'n':
+                raise ManualVerifyFailure(f'The tests expected "{expectation}" but that didn\'t happen')
+            else:
+                print('Enter "y" or "n"')
+
+    if pytestconfig.getoption('--prompts') and pytestconfig.getoption('--real-display'):
+        return check_expectation
+    else:
+        return lambda expectation: None  # no-op
+
+
 def pytest_addoption(parser):
     parser.addoption(
-        "--no-prompts", action="store_true", default=False,
-        help="Skip the tests which prompt the user for confirmation"
+        "--prompts", action="store_true", default=False,
+        help="Prompt the user to confirm what the real display shows"
+    )
+    parser.addoption(
+        "--real-display", action="store_true", default=False,
+        help="Run the tests against a GTT display on /dev/ttyUSB0 instead of a mocked one"
     )
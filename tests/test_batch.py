@@ -0,0 +1,200 @@
+from pytest import raises
+
+from gtt import GttDisplay
+from gtt.exceptions import StatusError
+from gtt.gtt_display import _MAX_UNCHECKED_STATUSES
+
+
+def test_batch_flushes_on_exit(display: GttDisplay):
+    sent_before = len(display._conn.sent_messages)
+
+    with display.batch():
+        display.clear_screen()
+        display.clear_screen()
+        assert len(display._conn.sent_messages) == sent_before
+
+    assert len(display._conn.sent_messages) == sent_before + 1
+    assert display._conn.sent_messages[-1] == bytes.fromhex('FE 58 FE 58')
+
+
+def test_batch_defers_status_responses(display: GttDisplay, cli_verify):
+    sent_before = len(display._conn.sent_messages)
+    received_before = len(display._conn.bytes_received)
+
+    with display.batch():
+        display.clear_screen()
+        display.create_plain_bar(1, 5, 10, 0, 0, 10, 100)
+        display.create_plain_bar(2, 7, 10, 20, 0, 10, 100)
+        assert len(display._conn.sent_messages) == sent_before
+        assert len(display._conn.bytes_received) == received_before
+
+    assert len(display._conn.sent_messages) == sent_before + 1
+    assert display._conn.sent_messages[-1] == bytes.fromhex(
+        'FE 58'
+        'FE 67 01 0000 000A 0000 0000 000A 0064 FFFFFF 000000 00'
+        'FE 69 01 0005'
+        'FE 67 02 0000 000A 0014 0000 000A 0064 FFFFFF 000000 00'
+        'FE 69 02 0007'
+    )
+    assert display._conn.bytes_received.endswith(bytes.fromhex('FC 69 0001 FE FC 69 0001 FE'))
+    cli_verify('There are two bars at the top left of the screen which are 50% and 70% full')
+
+
+def test_pipelined_updates(display: GttDisplay, cli_verify):
+    display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+    display.pipeline_depth = 3
+    received_before = len(display._conn.bytes_received)
+
+    for value in range(1, 4):
+        display.update_bar_value(1, value)
+    assert len(display._conn.bytes_received) == received_before
+
+    display.update_bar_value(1, 4)
+    assert len(display._conn.bytes_received) == received_before + 5
+
+    display.sync()
+    assert len(display._conn.bytes_received) == received_before + 4 * 5
+    cli_verify('A 10x100 bar at the top left of the screen is 40% full')
+
+
+def test_update_without_waiting(display: GttDisplay, cli_verify):
+    display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+    received_before = len(display._conn.bytes_received)
+
+    display.update_bar_value(1, 2, wait=False)
+    display.update_bar_value(1, 6, wait=False)
+    assert len(display._conn.bytes_received) == received_before
+
+    display.sync()
+    assert len(display._conn.bytes_received) == received_before + 2 * 5
+    cli_verify('A 10x100 bar at the top left of the screen is 60% full')
+
+
+def test_batch_overwrites_superseded_updates(display: GttDisplay, cli_verify):
+    display.create_plain_bar(1, 0, 10, x_pos=0, y_pos=0, width=10, height=100)
+    display.create_plain_bar('second', 0, 10, x_pos=20, y_pos=0, width=10, height=100)
+    received_before = len(display._conn.bytes_received)
+
+    with display.batch():
+        display.update_bar_value(1, 2)
+        display.update_bar_value('second', 4)
+        display.update_many_bar_values([(1, 5), ('second', 6), (1, 7)])
+
+    assert display._conn.sent_messages[-1] == bytes.fromhex('FE 69 01 0007 FE 69 FF 0006')
+    assert len(display._conn.bytes_received) == received_before + 2 * 5
+    cli_verify('There are two bars at the top left of the screen which are 70% and 60% full')
+
+    with display.batch():
+        display.update_bar_value(1, 2)
+        display.clear_screen()
+        display.update_bar_value(1, 3)
+
+    assert display._conn.sent_messages[-1] == bytes.fromhex('FE 69 01 0002 FE 58 FE 69 01 0003')
+
+
+def test_pipelined_update_failure(mocked_display: GttDisplay):
+    mocked_display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+    mocked_display.pipeline_depth = 2
+    mocked_display._conn.failed_bar_updates.append(9)
+
+    mocked_display.update_bar_value(1, 1)
+    mocked_display.update_bar_value(1, 2)
+    with raises(StatusError):
+        mocked_display.update_bar_value(1, 3)
+    assert len(mocked_display._pending_statuses) == 2
+
+    mocked_display.sync()
+    assert not mocked_display._pending_statuses
+    assert not mocked_display._conn._responses
+
+
+def test_update_many_failure(mocked_display: GttDisplay):
+    mocked_display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+    mocked_display.create_plain_bar(2, 0, 10, 20, 0, 10, 100)
+    mocked_display._conn.failed_bar_updates.append(9)
+
+    with raises(StatusError):
+        mocked_display.update_many_bar_values([(1, 1), (2, 2)])
+
+    mocked_display.sync()
+    assert not mocked_display._pending_statuses
+    assert not mocked_display._conn._responses
+
+    mocked_display._conn.failed_bar_updates.append(5)
+    with raises(StatusError):
+        mocked_display.update_bar_value(1, 3)
+
+
+def test_batch_update_failure(mocked_display: GttDisplay):
+    mocked_display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+    mocked_display.create_plain_bar(2, 0, 10, 20, 0, 10, 100)
+    mocked_display._conn.failed_bar_updates.append(9)
+
+    with raises(StatusError):
+        with mocked_display.batch():
+            mocked_display.update_bar_value(1, 4)
+            mocked_display.update_bar_value(2, 6)
+    assert len(mocked_display._pending_statuses) == 1
+
+    mocked_display.sync()
+    assert not mocked_display._pending_statuses
+    assert not mocked_display._conn._responses
+
+    mocked_display.update_bar_value(1, 5)
+    assert mocked_display._conn.bytes_received.endswith(bytes.fromhex('FC 69 0001 FE'))
+
+
+def test_batch_discarded_on_exception(mocked_display: GttDisplay):
+    mocked_display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+    sent_before = len(mocked_display._conn.sent_messages)
+
+    with raises(ValueError):
+        with mocked_display.batch():
+            mocked_display.update_bar_value(1, 4)
+            mocked_display.create_plain_bar('speed', 0, 10, 20, 0, 10, 100)
+            mocked_display.update_bar_value('missing', 6)
+
+    assert len(mocked_display._conn.sent_messages) == sent_before
+    assert not mocked_display._pending_statuses
+    assert mocked_display.ids_in_use == {1}
+
+    mocked_display.update_bar_value(1, 5)
+    assert mocked_display._conn.sent_messages[-1] == bytes.fromhex('FE 69 01 0005')
+
+    with raises(ValueError):
+        mocked_display.update_bar_value('speed', 3)
+
+    mocked_display.create_plain_bar('speed', 0, 10, 20, 0, 10, 100)
+    assert mocked_display.ids_in_use == {1, 255}
+
+    with raises(RuntimeError):
+        with mocked_display.batch():
+            mocked_display.create_plain_bar('rpm', 0, 10, 40, 0, 10, 100)
+            mocked_display.flush()
+            mocked_display.create_plain_bar('gear', 0, 10, 60, 0, 10, 100)
+            raise RuntimeError
+
+    assert mocked_display.ids_in_use == {1, 255, 254}
+    mocked_display.sync()
+    mocked_display.update_bar_value('rpm', 3)
+
+
+def test_negative_pipeline_depth(display: GttDisplay):
+    with raises(ValueError):
+        display.pipeline_depth = -1
+
+    with raises(ValueError):
+        GttDisplay('/dev/ttyUSB0', pipeline_depth=-1)
+
+    assert display.pipeline_depth == 0
+
+
+def test_unchecked_statuses_are_capped(display: GttDisplay):
+    display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+
+    for value in range(2 * _MAX_UNCHECKED_STATUSES):
+        display.update_bar_value(1, value % 11, wait=False)
+    assert len(display._pending_statuses) == _MAX_UNCHECKED_STATUSES
+
+    display.sync()
+    assert not display._pending_statuses
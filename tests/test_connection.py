@@ -0,0 +1,40 @@
+from pytest import raises
+
+from gtt import GttDisplay
+from gtt.exceptions import StatusError, UnexpectedResponse
+
+
+def test_low_latency_mode_not_implemented(mocked_serial, monkeypatch):
+    def set_low_latency_mode(self, low_latency_settings):
+        raise NotImplementedError('Low latency not supported on this platform')
+
+    monkeypatch.setattr(mocked_serial, 'set_low_latency_mode', set_low_latency_mode, raising=False)
+
+    display = GttDisplay('/dev/ttyUSB0')
+    assert (display.width, display.height) == (480, 272)
+
+
+def test_status_error(mocked_display: GttDisplay):
+    mocked_display.create_plain_bar(1, 0, 10, 0, 0, 10, 100)
+    mocked_display._conn.failed_bar_updates.append(9)
+
+    with raises(StatusError, match='code 9: "invalid command parameters"'):
+        mocked_display.update_bar_value(1, 5)
+
+    mocked_display._conn.failed_bar_updates.append(42)
+    with raises(StatusError, match='code 42: "unknown code"'):
+        mocked_display.update_bar_value(1, 5)
+
+
+def test_truncated_response(mocked_serial, monkeypatch):
+    monkeypatch.setattr(mocked_serial, 'RESPONSES', {0x03: bytes.fromhex('FC 03 0004 01E0')})
+
+    with raises(TimeoutError):
+        GttDisplay('/dev/ttyUSB0')
+
+
+def test_undersized_response(mocked_serial, monkeypatch):
+    monkeypatch.setattr(mocked_serial, 'RESPONSES', {0x03: bytes.fromhex('FC 03 0002 01E0 0110')})
+
+    with raises(UnexpectedResponse):
+        GttDisplay('/dev/ttyUSB0')
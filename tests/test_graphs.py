@@ -1,17 +1,39 @@
+import pytest
 from pytest import raises
 
-from tests.fixtures import *
+from gtt import GttDisplay
 from gtt.enums import BarDirection
 
+SIMPLE_CREATE_MESSAGE = bytes.fromhex(
+    'FE 67 01 0000 000A 0000 0000 000A 0064 FFFFFF 606060 03'
+    'FE 69 01 0005'
+)
+SIMPLE_UPDATE_MESSAGE = bytes.fromhex('FE 69 01 0009')
+UPDATE_MANY_MESSAGE = bytes.fromhex('FE 69 01 0003 FE 69 FF 0008')
+
+INVALID_CREATE_ARGS = [
+    (ValueError, dict(bar_id=3, value=3, max_value=4, x_pos=10000, y_pos=0, width=1, height=1)),
+    (ValueError, dict(bar_id=4, value=3, max_value=4, x_pos=0, y_pos=70, width=1, height=10000)),
+    (ValueError, dict(bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, bg_color_hex='feet')),
+    (ValueError, dict(bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, fg_color_hex='00000G')),
+    (ValueError, dict(bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, fg_color_hex='0')),
+    (ValueError, dict(bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, fg_color_hex='FF FF ')),
+    (ValueError, dict(bar_id=5, value=2e7, max_value=3, x_pos=0, y_pos=0, width=1, height=1)),
+    (ValueError, dict(bar_id=5, value=2, max_value=3, x_pos=-20, y_pos=0, width=1, height=1)),
+    (ValueError, dict(bar_id=6, value=1, max_value=2, x_pos=5, y_pos=0, width=0, height=1)),
+    (TypeError, dict(
+        bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, fg_color_hex=255.0, bg_color_hex=0.0
+    )),
+]
+
 
 def test_simple(display: GttDisplay, cli_verify):
     display.create_plain_bar(1, 5, 10, 0, 0, 10, 100, bg_color_hex='606060', direction=BarDirection.TOP_TO_BOTTOM)
-    assert display._conn.sent_messages[-2] == bytes.fromhex('FE 67 01 0000 000A 0000 0000 000A 0064 FFFFFF 606060 03')
-    assert display._conn.sent_messages[-1] == bytes.fromhex('FE 69 01 0005')
+    assert display._conn.sent_messages[-1] == SIMPLE_CREATE_MESSAGE
     cli_verify('A 10x100 top-to-bottom bar at the top right of the screen is half full')
 
     display.update_bar_value(1, 9)
-    assert display._conn.sent_messages[-1] == bytes.fromhex('FE 69 01 0009')
+    assert display._conn.sent_messages[-1] == SIMPLE_UPDATE_MESSAGE
     cli_verify('The bar is now 90% full')
 
 
@@ -51,17 +73,42 @@ def test_right_bar(display: GttDisplay, cli_verify):
     cli_verify('There is a small rectangle near the top right of the screen')
 
 
-def test_invalid_create(display: GttDisplay):
-    invalid_args = [
-        dict(bar_id=3, value=3, max_value=4, x_pos=display.width + 1, y_pos=0, width=1, height=1),
-        dict(bar_id=4, value=3, max_value=4, x_pos=0, y_pos=70, width=1, height=display.width),
-        dict(bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, bg_color_hex='feet'),
-        dict(bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, fg_color_hex='00000G'),
-        dict(bar_id=5, value=2, max_value=3, x_pos=0, y_pos=0, width=1, height=1, fg_color_hex='0'),
-        dict(bar_id=5, value=2e7, max_value=3, x_pos=0, y_pos=0, width=1, height=1),
-        dict(bar_id=5, value=2, max_value=3, x_pos=-20, y_pos=0, width=1, height=1),
-    ]
-
-    for kwargs in invalid_args:
-        with raises(ValueError):
-            display.create_plain_bar(**kwargs)
+@pytest.mark.parametrize('error, kwargs', INVALID_CREATE_ARGS)
+def test_invalid_create(display: GttDisplay, error, kwargs):
+    display.create_plain_bar(1, 0, 10, 0, 0, 10, 100, fg_color_hex=0xFF, bg_color_hex=0)  # caches these colors
+
+    with raises(error):
+        display.create_plain_bar(**kwargs)
+
+
+def test_update_many(display: GttDisplay, cli_verify):
+    display.create_plain_bar(1, 0, 10, x_pos=0, y_pos=0, width=10, height=100)
+    display.create_plain_bar('second', 0, 10, x_pos=20, y_pos=0, width=10, height=100)
+
+    display.update_many_bar_values([(1, 3), ('second', 8)])
+    assert display._conn.sent_messages[-1] == UPDATE_MANY_MESSAGE
+    cli_verify('There are two bars at the top left of the screen which are 30% and 80% full')
+
+    with raises(ValueError):
+        display.update_many_bar_values([(1, 5), ('third', 5)])
+    assert display._conn.sent_messages[-1] == UPDATE_MANY_MESSAGE
+
+
+def test_int_colors(display: GttDisplay, cli_verify):
+    display.create_plain_bar(1, 5, 10, 0, 0, 10, 100, fg_color_hex=0x00FF00, bg_color_hex=b'\x00\x00\x80')
+    assert display._conn.sent_messages[-1][15:21] == bytes.fromhex('00FF00 000080')
+    cli_verify('A 10x100 bar at the top left of the screen is half green and half navy')
+
+
+def test_bar_updater(display: GttDisplay, cli_verify):
+    display.create_plain_bar('fred', 0, 10, x_pos=0, y_pos=0, width=10, height=100)
+    update_fred = display.make_bar_updater('fred')
+
+    for value in range(11):
+        update_fred(value)
+        assert display._conn.sent_messages[-1] == bytes.fromhex('FE 69 FF') + value.to_bytes(2, 'big')
+
+    cli_verify('A 10x100 bar at the top left of the screen is full')
+
+    with raises(ValueError):
+        display.make_bar_updater('jim')
@@ -1,6 +1,5 @@
 from pytest import raises
 
-from tests.fixtures import *
 from gtt.exceptions import *
 
 
@@ -57,3 +56,9 @@ def test_id_validation(display):
 
     with raises(ValueError):
         display._resolve_id(5, new=True)
+
+    with raises(TypeError):
+        display._resolve_id(5.0)
+
+    with raises(TypeError):
+        display._resolve_id(5.0, new=True)